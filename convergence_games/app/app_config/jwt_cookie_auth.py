@@ -1,10 +1,10 @@
+import time
 from typing import Any, cast
 
 from litestar.connection import ASGIConnection
 from litestar.exceptions import NotAuthorizedException
 from litestar.middleware.authentication import AuthenticationResult
 from litestar.security.jwt import JWTCookieAuth, JWTCookieAuthenticationMiddleware
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
 from convergence_games.app.context import user_id_ctx
@@ -12,20 +12,48 @@ from convergence_games.app.request_type import CustomToken
 from convergence_games.db.models import User
 from convergence_games.settings import SETTINGS
 
+USER_CACHE_TTL_SECONDS = 30
+USER_CACHE_MAX_SIZE = 4096
+
+# Detached users keyed by id, with the monotonic time they expire at.
+# The same User instance is handed to every concurrent request as request.user, so it must never be modified in
+# place - load a fresh User in the handler's own session to make changes, then call clear_user_cache.
+_user_cache: dict[int, tuple[float, User]] = {}
+
+
+def clear_user_cache(user_id: int | None = None) -> None:
+    # Call this after updating a user so the next request doesn't see the stale cached copy.
+    # This only clears the current worker process; other workers keep their copy until the TTL expires.
+    if user_id is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(user_id, None)
+
 
 async def retrieve_user_handler(token: CustomToken, connection: ASGIConnection) -> User | None:
-    print(f"Token: {token}")
+    if SETTINGS.DEBUG:
+        print(f"Token: {token}")
 
     user_id = int(token.sub)
 
-    engine = cast(AsyncEngine, connection.app.state.db_engine)
-    async with AsyncSession(engine) as async_session:
-        async with async_session.begin():
-            stmt = select(User).where(User.id == user_id)
-            user = (await async_session.execute(stmt)).scalar_one_or_none()
+    cached = _user_cache.get(user_id)
+    if cached is not None and cached[0] > time.monotonic():
+        user = cached[1]
+    else:
+        engine = cast(AsyncEngine, connection.app.state.db_engine)
+        async with AsyncSession(engine) as async_session:
+            user = await async_session.get(User, user_id)
             async_session.expunge_all()
 
-    print(f"User: {user}")
+        _user_cache.pop(user_id, None)
+        if user is not None:
+            if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+                # Dicts keep insertion order, so the first key is the oldest entry
+                _user_cache.pop(next(iter(_user_cache)))
+            _user_cache[user_id] = (time.monotonic() + USER_CACHE_TTL_SECONDS, user)
+
+    if SETTINGS.DEBUG:
+        print(f"User: {user}")
 
     user_id_ctx.set(user_id)
     return user
@@ -1,3 +1,5 @@
+import re
+from pathlib import Path
 from typing import Any
 
 import jinjax
@@ -8,13 +10,12 @@ from litestar.template.config import TemplateConfig
 
 from convergence_games.app.paths import COMPONENTS_DIR_PATH, TEMPLATES_DIR_PATH
 
+TITLE_PATTERN = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+
 
 def extract_title(text: jinjax.catalog.CallerWrapper) -> str:
-    title_start = text.find("<title>")
-    if not title_start:
-        return ""
-    title_end = text.find("</title>", title_start)
-    return text._content[title_start + 7 : title_end]
+    match = TITLE_PATTERN.search(text._content)
+    return match.group(1) if match else ""
 
 
 def debug(text: Any) -> str:
@@ -28,16 +29,29 @@ def blah(context, text: str) -> None:
     print(text)
 
 
-original_init = jinjax.Component.__init__
-
-
-class ComponentWithRequestPassthrough(jinjax.Component):
-    def __init__(self, *args, **kwargs):
-        original_init(self, *args, **kwargs)
-        self.optional["request"] = None
+class CatalogWithRequestPassthrough(jinjax.Catalog):
+    # Every component accepts an optional request, so the one passed by JinjaXWithRequestPassthrough
+    # doesn't end up in attrs. The cache stores the loaded component, so this only runs once per component.
+    def _get_from_file(self, *, prefix: str, name: str, file_ext: str) -> jinjax.Component:
+        component = super()._get_from_file(prefix=prefix, name=name, file_ext=file_ext)
+        component.optional["request"] = None
+        return component
 
+    def _get_from_source(self, *, name: str, prefix: str, source: str) -> jinjax.Component:
+        component = super()._get_from_source(name=name, prefix=prefix, source=source)
+        component.optional["request"] = None
+        return component
 
-jinjax.Component.__init__ = ComponentWithRequestPassthrough.__init__  # type: ignore
+    def prewarm(self, prefix: str = "") -> None:
+        # Load and compile every component up front, rather than on the first request that renders it
+        loader = self.prefixes[prefix]
+        self.jinja_env.loader = loader
+        for root_path in map(Path, loader.searchpath):
+            for path in root_path.rglob("*.jinja"):
+                relative_parent = path.parent.relative_to(root_path).parts
+                stem = path.name[: -len("".join(path.suffixes))]
+                name = ".".join(relative_parent + (stem,))
+                self._get_from_cache(prefix=prefix, name=name, file_ext="")
 
 
 class JinjaXWithRequestPassthrough(jinjax.JinjaX):
@@ -59,8 +73,9 @@ jinja_env.filters["debug"] = debug
 jinja_env.filters["extract_title"] = extract_title
 jinja_env.globals["blah"] = blah
 
-catalog = jinjax.Catalog(jinja_env=jinja_env)
+catalog = CatalogWithRequestPassthrough(jinja_env=jinja_env)
 catalog.add_folder(COMPONENTS_DIR_PATH)
+catalog.prewarm()
 
 template_engine = JinjaTemplateEngine.from_environment(jinja_env)
 